@@ -1,32 +1,13 @@
 from pickle import dump, HIGHEST_PROTOCOL
-from scripts import calculate_all_ifvs_fvs_las, calculate_f1_score, file_exist, fv_calculation, ifv_calculation, \
-    label_players_fv, label_players_ifv, load_csv, load_pickle, run_aiide_ifv_experiment, run_aiide_redef_experiment
+from scripts import calculate_f1_score, estimate_cdcr, file_exist, fv_calculation, ifv_calculation, \
+    label_players_fv, label_players_ifv, load_csv, load_pickle, run_experiments_config
 
 
 def main():
     # Perform all experiments
-    # Import raw data
-    data_lol = load_csv('Data/lol_player_log_history.csv')
-    data_wow = load_csv('Data/wow_player_log_history.csv')
-
-    # Calculate the metrics
-    calculate_all_ifvs_fvs_las('LOL', data_lol)
-    calculate_all_ifvs_fvs_las('WOW', data_wow)
-
-    # Import pre-processed data
-    data_lol_fvs = load_pickle('Data/LOL_all_fvs_las.p')
-    data_lol_ifvs = load_pickle('Data/LOL_all_ifvs_las.p')
-    data_wow_fvs = load_pickle('Data/WOW_all_fvs_las.p')
-    data_wow_ifvs = load_pickle('Data/WOW_all_ifvs_las.p')
-
-    # Define windows sizes
-    windows_sizes = [7, 14, 21, 30, 60, 90, 180, 270]
-
-    # Run the experiments scripts with and without redefinition for both LOL and WOW
-    run_aiide_ifv_experiment('LOL', data_lol_fvs, data_lol_ifvs, windows_sizes)
-    run_aiide_redef_experiment('LOL', data_lol_fvs, data_lol_ifvs, windows_sizes, 0.05)
-    run_aiide_ifv_experiment('WOW', data_wow_fvs, data_wow_ifvs, windows_sizes)
-    run_aiide_redef_experiment('WOW', data_wow_fvs, data_wow_ifvs, windows_sizes, 0.05)
+    # The datasets, windows sizes, thresholds and folders are defined in the run configuration file.
+    # The datasets are loaded, their metrics calculated and their experiments performed concurrently
+    run_experiments_config('config.json')
 
     # # Production environment example
     # # Import the data
@@ -60,6 +41,35 @@ def main():
     #         # Train the model using your features the old labels (i.e., hist_labels_fv)
     #         print('Start you model training')
 
+    # # Production environment example for huge player bases
+    # # Import the data
+    # data = load_csv('Data/YOUR_DATA_FILE.csv')
+    # # Calculate the FV
+    # fv, la = fv_calculation(data)
+    # # User defined threshold (in this case 0.05)
+    # threshold = 0.05  # 5%
+    # # Check for historical labels
+    # if not file_exist('hist_labels_fv.p'):
+    #     # Label the players and save the File
+    #     players_labels_fv = label_players_fv(fv, la)
+    #     dump(players_labels_fv, open('hist_labels_fv.p', 'wb'), protocol=HIGHEST_PROTOCOL)
+    #     # Train the model using your features and the <players_labels_fv> labels
+    # else:
+    #     # Load historical labels
+    #     hist_labels_fv = load_pickle('hist_labels_fv.p')
+    #     # Estimate the CDCR labeling only a sample of the players, instead of labeling all of them and
+    #     # calculating the F1-Score. The exact CDCR is only calculated if the decision is uncertain
+    #     _, _, _, cdcr, lower, upper, exact = estimate_cdcr(hist_labels_fv, fv, la, threshold)
+    #     if cdcr > threshold:
+    #         # Label the players and save the File
+    #         players_labels_fv = label_players_fv(fv, la)
+    #         dump(players_labels_fv, open('hist_labels_fv.p', 'wb'), protocol=HIGHEST_PROTOCOL)
+    #         # Train the model using your features the new labels (i.e., players_labels_fv)
+    #         print('Start you model training')
+    #     else:
+    #         # Train the model using your features the old labels (i.e., hist_labels_fv)
+    #         print('Start you model training')
+
 
 if __name__ == '__main__':
     main()
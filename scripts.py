@@ -1,7 +1,361 @@
+from array import array
+from bisect import bisect_left
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
 from csv import reader
+from json import dumps, loads
 from math import sqrt
 from pathlib import Path
 from pickle import dump, HIGHEST_PROTOCOL, load
+from random import Random
+from statistics import NormalDist
+from sys import byteorder
+from time import perf_counter
+
+
+def absences_with_return(frequency: list):
+    """
+    Calculate the sum and the number of a player's Absences With Return and the Last Absence
+
+    :param frequency: A list containing a player's frequency
+    :return: The player's Absences With Return summed, the number of Absences With Return and the Last Absence
+    """
+    absence = 0
+    average = 0
+    count = 0
+    last_absence = 0
+
+    index = frequency.count('-1')
+    # Disregard the days before a day played
+    while index < len(frequency):
+        # Sum all the absences
+        while '0' in frequency[index]:
+            absence += 1
+            index += 1
+            # If this is the last day
+            if index >= len(frequency):
+                last_absence = absence
+                break
+        # Sum an Absence With Return
+        if absence > 0 and index < len(frequency):
+            average += absence
+            absence = 0
+            count += 1
+        index += 1
+
+    return average, count, last_absence
+
+
+def aiide_window_experiment(dataset: str, window_size: int, threshold: float = None, players_cohort: dict = None,
+                            logs_dir: str = 'Logs', logs_format: str = 'sheets', columnar_dir: str = None):
+    """
+    Perform the paper experiments for a window size, consuming the days' snapshots in increasing order.
+    Each snapshot must be sent as a tuple (day, fv, ifv, la, cfv), as yielded by <iterate_ifvs_fvs_las>,
+    and a None must be sent after the last day. The days before the window is complete are ignored.
+    Only the previous definitions are kept, so the snapshots already consumed can be released
+
+    :param dataset: The name of the game where the data was collected. Used for file naming only
+    :param window_size: The window size used in the experiment
+    :param threshold: The threshold used in the CDCR comparison. If None, the definitions are never redefined
+    :param players_cohort: The players' cohort. If informed, the cohort-level CDCR is also calculated
+    :param logs_dir: The folder where the logs are stored
+    :param logs_format: 'sheets' to store the logs formatted for Google Sheets, 'columnar' to store the per-day
+    results as typed columns in the Columnar folder (see <write_columnar_results>) or 'both'
+    :param columnar_dir: The folder where the per-day results are stored as typed columns. If None, the Columnar
+    folder inside the logs folder
+    :return: The FV, IFV and cohorts' FV averages formatted for Google Sheets, as the StopIteration value
+    """
+    if logs_format not in ('sheets', 'columnar', 'both'):
+        raise Exception(f"Logs format unknown: {logs_format}")
+    sheets = logs_format in ('sheets', 'both')
+    columnar = logs_format in ('columnar', 'both')
+    # The logs with redefinition are stored apart
+    suffix = '' if threshold is None else '_Redef'
+
+    # Initialize variables
+    # Previous players' FV
+    players_prev_fv = None
+    # Previous players' IFV
+    players_prev_ifv = {}
+    # Previous cohorts' FV
+    players_prev_cfv = None
+
+    # Create FV log header
+    if sheets:
+        with open('{}/log_{}_{}_{}{}.csv'.format(logs_dir, dataset, 'FV', window_size, suffix), 'w') as file:
+            file.write('FV;Standard Deviation;Number of Players;TP;FP;TN;FN;Precision;Recall;F1-Score;CDCR\n')
+
+    # Create IFV log header
+    if sheets:
+        with open('{}/log_{}_{}_{}{}.csv'.format(logs_dir, dataset, 'IFV', window_size, suffix), 'w') as file:
+            file.write('Number of Players;TP;FP;TN;FN;Precision;Recall;F1-Score;CDCR\n')
+
+    if players_cohort is not None:
+        # Create CFV log header
+        if sheets:
+            with open('{}/log_{}_{}_{}{}.csv'.format(logs_dir, dataset, 'CFV', window_size, suffix), 'w') as file:
+                file.write('Number of Cohorts;Number of Players;TP;FP;TN;FN;Precision;Recall;F1-Score;CDCR\n')
+
+    days_list = []
+    players_qnt_list = []
+    cohorts_qnt_list = []
+    players_prev_fv_average = []
+    std_dev_average = []
+    fv_tp_average = []
+    fv_fp_average = []
+    fv_tn_average = []
+    fv_fn_average = []
+    fv_precision_average = []
+    fv_recall_average = []
+    fv_f1_score_average = []
+    fv_cdcr_average = []
+    ifv_tp_average = []
+    ifv_fp_average = []
+    ifv_tn_average = []
+    ifv_fn_average = []
+    ifv_precision_average = []
+    ifv_recall_average = []
+    ifv_f1_score_average = []
+    ifv_cdcr_average = []
+    cfv_tp_average = []
+    cfv_fp_average = []
+    cfv_tn_average = []
+    cfv_fn_average = []
+    cfv_precision_average = []
+    cfv_recall_average = []
+    cfv_f1_score_average = []
+    cfv_cdcr_average = []
+
+    # Receive the days' snapshots, one day at a time, until a None is sent
+    while True:
+        snapshot = yield
+        if snapshot is None:
+            break
+        day, fv, cur_ifv, cur_la, cfv = snapshot
+        # The window must be complete
+        if day < window_size:
+            continue
+
+        # Reset variables
+        labels_fv_prev = {}
+        labels_ifv_curr = {}
+        labels_ifv_prev = {}
+        labels_cfv_prev = {}
+
+        if players_prev_fv is None:
+            # Gather the FV for the players in the period
+            players_prev_fv = fv
+
+        if players_cohort is not None and players_prev_cfv is None:
+            # Gather the cohorts' FV for the players in the period
+            players_prev_cfv = cfv
+
+        # If this is not the first IFV calculation, compare with the previous churn definition
+        if len(players_prev_ifv) > 0:
+            # Calculate the CDCR
+            for player in players_prev_ifv.keys():
+                # Set the current IFV labels for the player
+                if cur_la[player] > cur_ifv[player]:
+                    labels_ifv_curr[player] = 'Churner'
+                else:
+                    labels_ifv_curr[player] = 'Non-Churner'
+
+                # Set the previous FV labels for the player
+                if cur_la[player] > players_prev_fv:
+                    labels_fv_prev[player] = 'Churner'
+                else:
+                    labels_fv_prev[player] = 'Non-Churner'
+
+                # Set the previous IFV labels for the player
+                if cur_la[player] > players_prev_ifv[player]:
+                    labels_ifv_prev[player] = 'Churner'
+                else:
+                    labels_ifv_prev[player] = 'Non-Churner'
+
+                # Set the previous cohort's FV labels for the player
+                if players_cohort is not None:
+                    if cur_la[player] > players_prev_cfv[players_cohort.get(player, 'Unknown')]:
+                        labels_cfv_prev[player] = 'Churner'
+                    else:
+                        labels_cfv_prev[player] = 'Non-Churner'
+
+            # Get the total number of players
+            players_qnt = len(players_prev_ifv)
+            # Store the current day and number of players
+            days_list += [day]
+            players_qnt_list += [players_qnt]
+            # Calculate the Standard Deviation
+            std_dev = calculate_std_dev(players_prev_fv, cur_ifv)
+            # Calculate the FV TP, FP, TN, FN, Precision, Recall, and F1-Score
+            tp, fp, tn, fn, precision, recall, f1_score = calculate_f1_score(labels_fv_prev,
+                                                                             labels_ifv_curr)
+            # Calculate the FV CDCR
+            fv_cdcr = 1 - f1_score
+            # Fix format for Google Sheets, only if the logs are stored for it
+            if sheets:
+                fv_values = [players_prev_fv, std_dev, players_qnt, tp, fp, tn, fn, precision, recall, f1_score,
+                             fv_cdcr]
+                fv_formated = format_for_google_sheets(fv_values)
+
+            # Store to calculate de averages
+            players_prev_fv_average += [players_prev_fv]
+            std_dev_average += [std_dev]
+            fv_tp_average += [tp]
+            fv_fp_average += [fp]
+            fv_tn_average += [tn]
+            fv_fn_average += [fn]
+            fv_precision_average += [precision]
+            fv_recall_average += [recall]
+            fv_f1_score_average += [f1_score]
+            fv_cdcr_average += [fv_cdcr]
+
+            # Calculate the IFV TP, FP, TN, FN, Precision, Recall, and F1-Score
+            tp, fp, tn, fn, precision, recall, f1_score = calculate_f1_score(labels_ifv_prev,
+                                                                             labels_ifv_curr)
+            # Calculate the IFV CDCR
+            ifv_cdcr = 1 - f1_score
+            # Fix format for Google Sheets, only if the logs are stored for it
+            if sheets:
+                ifv_values = [players_qnt, tp, fp, tn, fn, precision, recall, f1_score, ifv_cdcr]
+                ifv_formated = format_for_google_sheets(ifv_values)
+
+            # Store to calculate de averages
+            ifv_tp_average += [tp]
+            ifv_fp_average += [fp]
+            ifv_tn_average += [tn]
+            ifv_fn_average += [fn]
+            ifv_precision_average += [precision]
+            ifv_recall_average += [recall]
+            ifv_f1_score_average += [f1_score]
+            ifv_cdcr_average += [ifv_cdcr]
+
+            # Store FV log
+            if sheets:
+                with open('{}/log_{}_{}_{}{}.csv'.format(logs_dir, dataset, 'FV', window_size, suffix), 'a') as file:
+                    file.write('{};{};{};{};{};{};{};{};{};{};{}\n'.format(fv_formated[0], fv_formated[1],
+                                                                           fv_formated[2], fv_formated[3],
+                                                                           fv_formated[4], fv_formated[5],
+                                                                           fv_formated[6], fv_formated[7],
+                                                                           fv_formated[8], fv_formated[9],
+                                                                           fv_formated[10]))
+
+            # Store IFV log
+            if sheets:
+                with open('{}/log_{}_{}_{}{}.csv'.format(logs_dir, dataset, 'IFV', window_size, suffix), 'a') as file:
+                    file.write(
+                        '{};{};{};{};{};{};{};{};{}\n'.format(ifv_formated[0], ifv_formated[1], ifv_formated[2],
+                                                              ifv_formated[3], ifv_formated[4], ifv_formated[5],
+                                                              ifv_formated[6], ifv_formated[7],
+                                                              ifv_formated[8]))
+
+            if players_cohort is not None:
+                # Calculate the cohorts' FV TP, FP, TN, FN, Precision, Recall, and F1-Score
+                tp, fp, tn, fn, precision, recall, f1_score = calculate_f1_score(labels_cfv_prev,
+                                                                                 labels_ifv_curr)
+                # Calculate the cohorts' FV CDCR
+                cfv_cdcr = 1 - f1_score
+                # Fix format for Google Sheets, only if the logs are stored for it
+                if sheets:
+                    cfv_values = [len(players_prev_cfv), players_qnt, tp, fp, tn, fn, precision, recall, f1_score,
+                                  cfv_cdcr]
+                    cfv_formated = format_for_google_sheets(cfv_values)
+
+                # Store to calculate de averages
+                cfv_tp_average += [tp]
+                cfv_fp_average += [fp]
+                cfv_tn_average += [tn]
+                cfv_fn_average += [fn]
+                cfv_precision_average += [precision]
+                cfv_recall_average += [recall]
+                cfv_f1_score_average += [f1_score]
+                cfv_cdcr_average += [cfv_cdcr]
+                cohorts_qnt_list += [len(players_prev_cfv)]
+
+                # Store CFV log
+                if sheets:
+                    with open('{}/log_{}_{}_{}{}.csv'.format(logs_dir, dataset, 'CFV', window_size, suffix),
+                              'a') as file:
+                        file.write(';'.join(cfv_formated) + '\n')
+
+            # Verify the need to re-define the FV
+            if threshold is not None and fv_cdcr >= threshold:
+                # Re-define the FV
+                players_prev_fv = fv
+            # Verify the need to re-define the IFV
+            if threshold is not None and ifv_cdcr >= threshold:
+                # Re-define the IFV
+                players_prev_ifv = cur_ifv
+            # Verify the need to re-define the cohorts' FV
+            if threshold is not None and players_cohort is not None and cfv_cdcr >= threshold:
+                # Re-define the cohorts' FV
+                players_prev_cfv = cfv
+
+        else:
+            # Store the current IFV to be used in the next loop
+            players_prev_ifv = cur_ifv
+
+    if columnar:
+        # Store the per-day results as typed columns
+        if columnar_dir is None:
+            columnar_dir = '{}/Columnar'.format(logs_dir)
+        write_columnar_results(columnar_dir, dataset, window_size, threshold, 'FV' + suffix,
+                               [('Day', 'q', days_list), ('FV', 'd', players_prev_fv_average),
+                                ('Standard Deviation', 'd', std_dev_average),
+                                ('Number of Players', 'q', players_qnt_list), ('TP', 'q', fv_tp_average),
+                                ('FP', 'q', fv_fp_average), ('TN', 'q', fv_tn_average),
+                                ('FN', 'q', fv_fn_average), ('Precision', 'd', fv_precision_average),
+                                ('Recall', 'd', fv_recall_average), ('F1-Score', 'd', fv_f1_score_average),
+                                ('CDCR', 'd', fv_cdcr_average)])
+        write_columnar_results(columnar_dir, dataset, window_size, threshold, 'IFV' + suffix,
+                               [('Day', 'q', days_list), ('Number of Players', 'q', players_qnt_list),
+                                ('TP', 'q', ifv_tp_average), ('FP', 'q', ifv_fp_average),
+                                ('TN', 'q', ifv_tn_average), ('FN', 'q', ifv_fn_average),
+                                ('Precision', 'd', ifv_precision_average), ('Recall', 'd', ifv_recall_average),
+                                ('F1-Score', 'd', ifv_f1_score_average), ('CDCR', 'd', ifv_cdcr_average)])
+        if players_cohort is not None:
+            write_columnar_results(columnar_dir, dataset, window_size, threshold, 'CFV' + suffix,
+                                   [('Day', 'q', days_list), ('Number of Cohorts', 'q', cohorts_qnt_list),
+                                    ('Number of Players', 'q', players_qnt_list), ('TP', 'q', cfv_tp_average),
+                                    ('FP', 'q', cfv_fp_average), ('TN', 'q', cfv_tn_average),
+                                    ('FN', 'q', cfv_fn_average), ('Precision', 'd', cfv_precision_average),
+                                    ('Recall', 'd', cfv_recall_average), ('F1-Score', 'd', cfv_f1_score_average),
+                                    ('CDCR', 'd', cfv_cdcr_average)])
+
+    fv_average = [str(sum(players_prev_fv_average) / len(players_prev_fv_average)).replace('.', ','),
+                  str(sum(std_dev_average) / len(std_dev_average)).replace('.', ','),
+                  str(sum(fv_tp_average) / len(fv_tp_average)).replace('.', ','),
+                  str(sum(fv_fp_average) / len(fv_fp_average)).replace('.', ','),
+                  str(sum(fv_tn_average) / len(fv_tn_average)).replace('.', ','),
+                  str(sum(fv_fn_average) / len(fv_fn_average)).replace('.', ','),
+                  str(sum(fv_precision_average) / len(fv_precision_average)).replace('.', ','),
+                  str(sum(fv_recall_average) / len(fv_recall_average)).replace('.', ','),
+                  str(sum(fv_f1_score_average) / len(fv_f1_score_average)).replace('.', ','),
+                  str(sum(fv_cdcr_average) / len(fv_cdcr_average)).replace('.', ',')]
+
+    ifv_average = ['None',
+                   'None',
+                   str(sum(ifv_tp_average) / len(ifv_tp_average)).replace('.', ','),
+                   str(sum(ifv_fp_average) / len(ifv_fp_average)).replace('.', ','),
+                   str(sum(ifv_tn_average) / len(ifv_tn_average)).replace('.', ','),
+                   str(sum(ifv_fn_average) / len(ifv_fn_average)).replace('.', ','),
+                   str(sum(ifv_precision_average) / len(ifv_precision_average)).replace('.', ','),
+                   str(sum(ifv_recall_average) / len(ifv_recall_average)).replace('.', ','),
+                   str(sum(ifv_f1_score_average) / len(ifv_f1_score_average)).replace('.', ','),
+                   str(sum(ifv_cdcr_average) / len(ifv_cdcr_average)).replace('.', ',')]
+
+    cfv_average = None
+    if players_cohort is not None:
+        cfv_average = ['None',
+                       'None',
+                       str(sum(cfv_tp_average) / len(cfv_tp_average)).replace('.', ','),
+                       str(sum(cfv_fp_average) / len(cfv_fp_average)).replace('.', ','),
+                       str(sum(cfv_tn_average) / len(cfv_tn_average)).replace('.', ','),
+                       str(sum(cfv_fn_average) / len(cfv_fn_average)).replace('.', ','),
+                       str(sum(cfv_precision_average) / len(cfv_precision_average)).replace('.', ','),
+                       str(sum(cfv_recall_average) / len(cfv_recall_average)).replace('.', ','),
+                       str(sum(cfv_f1_score_average) / len(cfv_f1_score_average)).replace('.', ','),
+                       str(sum(cfv_cdcr_average) / len(cfv_cdcr_average)).replace('.', ',')]
+
+    return fv_average, ifv_average, cfv_average
 
 
 def average_absence_with_return(frequency: list):
@@ -45,16 +399,142 @@ def average_absence_with_return(frequency: list):
         return (average / count), 0
 
 
-def calculate_all_ifvs_fvs_las(dataset: str, data: dict) -> None:
+def broadcast_snapshots(snapshots, consumers: list) -> list:
+    """
+    Send each day's snapshot to all the consumers, so they share a single pass through the snapshots
+
+    :param snapshots: An iterable of days' snapshots, as yielded by <iterate_ifvs_fvs_las>
+    :param consumers: A list of generators receiving the snapshots (e.g., <aiide_window_experiment>)
+    :return: A list containing the value returned by each consumer
+    """
+    for consumer in consumers:
+        # Start the consumer
+        next(consumer)
+
+    for snapshot in snapshots:
+        for consumer in consumers:
+            consumer.send(snapshot)
+
+    results = []
+    for consumer in consumers:
+        # Signal the end of the snapshots and gather the consumer's result
+        try:
+            consumer.send(None)
+        except StopIteration as stop:
+            results += [stop.value]
+        else:
+            raise Exception("The consumer didn't finish after the last snapshot")
+
+    return results
+
+
+def build_absence_index(data: dict) -> dict:
+    """
+    Build an index of the players' absence runs, answering the IFV, LA and FV of any day without recalculating the
+    players' frequencies. The runs of all the players are stored in flat arrays sorted by player and day: the first
+    absence of each run, the day that ends it (the day played or, if it is still open, the number of days) and the
+    prefix sums of the runs' lengths. As described in the input data, the '-1' must only occur before the first day
+    played, otherwise an exception is raised by <encode_frequency>
+
+    :param data: The players' frequency, as returned by <load_csv> or <load_encoded_csv>
+    :return: A dict containing the index
+    """
+    players = list(data.keys())
+    # Number of days in the dataset
+    end = len(data[players[0]]) if len(players) > 0 else 0
+
+    # The days are stored using 2 bytes when possible
+    offsets = array('Q', [0])
+    starts = array('H' if end < pow(2, 16) else 'I')
+    ends = array('H' if end < pow(2, 16) else 'I')
+    lengths_sum = array('Q', [0])
+
+    for player in players:
+        frequency = data[player] if isinstance(data[player], bytes) else encode_frequency(data[player])
+        start = None
+        for day in range(0, len(frequency)):
+            # The absence run starts
+            if frequency[day] == 1 and start is None:
+                start = day
+            # The absence run ends
+            elif frequency[day] != 1 and start is not None:
+                starts.append(start)
+                ends.append(day)
+                lengths_sum.append(lengths_sum[-1] + day - start)
+                start = None
+        # Last Absence, still open at the end of the data
+        if start is not None:
+            starts.append(start)
+            ends.append(len(frequency))
+            lengths_sum.append(lengths_sum[-1] + len(frequency) - start)
+        offsets.append(len(starts))
+
+    return {'players': players, 'days': end, 'offsets': offsets, 'starts': starts, 'ends': ends,
+            'lengths_sum': lengths_sum, 'positions': {player: x for x, player in enumerate(players)}}
+
+
+def build_run_dag(config: dict) -> list:
+    """
+    Build the dependency graph of a run. Each dataset has a snapshots node (load the data and calculate all the FVs,
+    IFVs and LAs) followed by its experiments nodes, which only depend on the dataset's snapshots.
+    A dataset with streamed snapshots has a single node performing all its experiments
+
+    :param config: The run configuration, as returned by <load_run_config>
+    :return: A list containing the nodes, each one with its ID, kind, dependencies, memory and parameters
+    """
+    nodes = []
+    for dataset in config['datasets']:
+        # The snapshots are streamed to all the experiments in a single node, without storing them
+        if dataset['snapshots'] == 'stream':
+            nodes += [{'id': '{}:stream'.format(dataset['name']), 'kind': 'stream', 'deps': [],
+                       'memory_mb': dataset['memory_mb'], 'dataset': dataset, 'logs_dir': dataset['logs_dir']}]
+            continue
+
+        snapshots_id = '{}:snapshots'.format(dataset['name'])
+        snapshots_deps = []
+        snapshots_files = ['fvs', 'ifvs'] if dataset['cohorts'] is None else ['fvs', 'ifvs', 'cfvs']
+        # Reuse the snapshots already stored
+        if not (dataset['reuse_snapshots'] and
+                all(file_exist('{}/{}_all_{}_las.p'.format(dataset['data_dir'], dataset['name'], snapshots_file))
+                    for snapshots_file in snapshots_files)):
+            nodes += [{'id': snapshots_id, 'kind': 'snapshots', 'deps': [], 'memory_mb': dataset['memory_mb'],
+                       'dataset': dataset}]
+            snapshots_deps = [snapshots_id]
+
+        if 'ifv' in dataset['experiments']:
+            nodes += [{'id': '{}:ifv'.format(dataset['name']), 'kind': 'ifv', 'deps': snapshots_deps,
+                       'memory_mb': dataset['memory_mb'], 'dataset': dataset, 'logs_dir': dataset['logs_dir'],
+                       'columnar_dir': '{}/Columnar'.format(dataset['logs_dir'])}]
+
+        if 'redef' in dataset['experiments']:
+            for threshold in dataset['thresholds']:
+                logs_dir = dataset['logs_dir']
+                # Each threshold has its own folder to avoid overwriting the logs, while the per-day results of all the
+                # thresholds share the same Columnar folder, partitioned by threshold
+                if len(dataset['thresholds']) > 1:
+                    logs_dir = '{}/Threshold_{}'.format(logs_dir, threshold)
+                nodes += [{'id': '{}:redef:{}'.format(dataset['name'], threshold), 'kind': 'redef',
+                           'deps': snapshots_deps, 'memory_mb': dataset['memory_mb'], 'dataset': dataset,
+                           'logs_dir': logs_dir, 'columnar_dir': '{}/Columnar'.format(dataset['logs_dir']),
+                           'threshold': threshold}]
+
+    return nodes
+
+
+def calculate_all_ifvs_fvs_las(dataset: str, data: dict, players_cohort: dict = None, data_dir: str = 'Data') -> None:
     """
     Calculate all the Fixed Values, Individual Fixed Values and Last Absences from the players in the data
 
     :param dataset: The name of the game where the data was collected. Used for file naming only
     :param data: The players' frequency, key is the players' ID and values is a list starting from -1 until the first
     day of play. Later, each day played and not played should be represented by, respectively, 1 and 0.
+    :param players_cohort: Optional players' cohort, key is the players' ID and value is the cohort. If informed, the
+    cohorts' Fixed Values are also calculated
+    :param data_dir: The folder where the metrics are stored
     """
     all_ifvs_las = {}
     all_fvs_las = {}
+    all_cfvs_las = {}
 
     # Number of days in the dataset
     end = len(data[list(data.keys())[0]])
@@ -77,9 +557,18 @@ def calculate_all_ifvs_fvs_las(dataset: str, data: dict) -> None:
         # Store the current day FV
         all_fvs_las[x] = {'fv': cur_fv, 'la': cur_fv_la}
 
+        if players_cohort is not None:
+            # Calculate the cohorts' FV and Last Absence for the players in the period
+            cur_cfv, cur_cfv_la = cohort_fv_calculation(cur_data_train, players_cohort)
+
+            # Store the current day cohorts' FV
+            all_cfvs_las[x] = {'cfv': cur_cfv, 'la': cur_cfv_la}
+
     # Dump the variables using pickle
-    dump(all_ifvs_las, open('Data/{}_all_ifvs_las.p'.format(dataset), 'wb'), protocol=HIGHEST_PROTOCOL)
-    dump(all_fvs_las, open('Data/{}_all_fvs_las.p'.format(dataset), 'wb'), protocol=HIGHEST_PROTOCOL)
+    dump(all_ifvs_las, open('{}/{}_all_ifvs_las.p'.format(data_dir, dataset), 'wb'), protocol=HIGHEST_PROTOCOL)
+    dump(all_fvs_las, open('{}/{}_all_fvs_las.p'.format(data_dir, dataset), 'wb'), protocol=HIGHEST_PROTOCOL)
+    if players_cohort is not None:
+        dump(all_cfvs_las, open('{}/{}_all_cfvs_las.p'.format(data_dir, dataset), 'wb'), protocol=HIGHEST_PROTOCOL)
 
 
 def calculate_f1_score(test_labels: dict, true_labels: dict):
@@ -141,6 +630,248 @@ def calculate_std_dev(average_general: float, average_individual: dict) -> float
     return sqrt(summ)
 
 
+def cohort_fv_calculation(data: dict, players_cohort: dict):
+    """
+    Calculate the Fixed Value of each cohort and the Last Absence from the players' frequencies data.
+    All the cohorts are aggregated in a single pass through the players
+
+    :param data: The data containing the players' frequency
+    :param players_cohort: The players' cohort, key is the players' ID and value is the cohort. Players without a
+    cohort are grouped in the 'Unknown' cohort
+    :return: The cohorts' Fixed Value and the players' Last Absence
+    """
+    cohorts_average = {}
+    cohorts_count = {}
+    players_last_absence = {}
+    for player in data.keys():
+        cohort = players_cohort.get(player, 'Unknown')
+        average, count, last_absence = absences_with_return(data[player])
+        # Sum the player's Absences With Return to the cohort's average
+        cohorts_average[cohort] = cohorts_average.get(cohort, 0) + average
+        cohorts_count[cohort] = cohorts_count.get(cohort, 0) + count
+        players_last_absence[player] = last_absence
+
+    cohorts_fv = {}
+    for cohort in cohorts_average.keys():
+        if cohorts_count[cohort] == 0:
+            # None player of the cohort had an Absence With Return
+            cohorts_fv[cohort] = 0
+        else:
+            # The cohort's Absence With Return averaged
+            cohorts_fv[cohort] = cohorts_average[cohort] / cohorts_count[cohort]
+
+    return cohorts_fv, players_last_absence
+
+
+def encode_frequency(frequency: list) -> bytes:
+    """
+    Encode a player's frequency using a byte per day: 0 for '-1', 1 for an absence and 2 for a day played.
+    As described in the input data, the '-1' must only occur before the first day played or absent, since the
+    reference functions disregard as many first days as the number of '-1' in the frequency
+
+    :param frequency: A list containing a player's frequency
+    :return: The player's frequency encoded
+    """
+    encoded = bytes([0 if day == '-1' else 1 if '0' in day else 2 for day in frequency])
+    # Number of '-1' before the first day played or absent
+    first_day = len(encoded) - len(encoded.lstrip(bytes([0])))
+    if 0 in encoded[first_day:]:
+        raise Exception(f"The '-1' occurs after the first day played or absent, on day {encoded.index(0, first_day)}")
+
+    return encoded
+
+
+def estimate_cdcr(hist_labels: dict, definition, players_la: dict, threshold: float, sample_size: int = 10000,
+                  confidence: float = 0.95, seed: int = 0, players_strata: dict = None):
+    """
+    Estimate the CDCR between the historical labels and the labels of a new definition (FV or IFV) using a stratified
+    sample of the players, so only the sampled players are labeled. The players are stratified by their historical
+    label (and by their stratum, if informed) and the sample is reproducible for the same seed and players.
+    The strata too small to have thirty players sampled are merged per historical label.
+    If the confidence interval contains the threshold, less than five labels changed in the sample or the sample size
+    cannot sample two players per stratum, the decision is uncertain and the exact CDCR is calculated
+
+    :param hist_labels: The players' historical labels, as returned by <label_players_fv> or <label_players_ifv>
+    :param definition: The new definition, the player base Fixed Value or each player's Individual Fixed Value
+    :param players_la: Each player's Last Absence
+    :param threshold: The threshold used in the CDCR comparison
+    :param sample_size: The number of players sampled
+    :param confidence: The confidence level of the interval
+    :param seed: The seed used to sample the players
+    :param players_strata: Optional players' stratum (e.g., their cohort)
+    :return: The TP, FP and FN estimated, the CDCR estimated, its confidence interval lower and upper bounds and if
+    the exact computation was performed
+    """
+    # Group the players by stratum
+    strata = {}
+    for player, label in hist_labels.items():
+        if players_strata is None:
+            stratum = label
+        else:
+            stratum = (players_strata.get(player, 'Unknown'), label)
+        if stratum not in strata:
+            strata[stratum] = []
+        strata[stratum].append(player)
+
+    # Merge the strata too small to have thirty players sampled (i.e., to estimate their variance) in a stratum per
+    # historical label, whose key can't be a player's stratum
+    if players_strata is not None:
+        merged_strata = object()
+        for stratum in list(strata.keys()):
+            if sample_size * len(strata[stratum]) / len(hist_labels) < 30:
+                merged = (merged_strata, stratum[1])
+                if merged not in strata:
+                    strata[merged] = []
+                strata[merged] += strata.pop(stratum)
+
+    # Proportional allocation, with at least two players per stratum and capped by the sample size
+    allocation = {}
+    for stratum, population in strata.items():
+        allocation[stratum] = min(len(population), max(2, int(sample_size * len(population) / len(hist_labels))))
+    shortfalls = sorted(strata.keys(), reverse=True,
+                        key=lambda x: sample_size * len(strata[x]) / len(hist_labels) - allocation[x])
+    for stratum in shortfalls:
+        if sum(allocation.values()) >= sample_size:
+            break
+        if allocation[stratum] < len(strata[stratum]):
+            allocation[stratum] += 1
+    while sum(allocation.values()) > sample_size:
+        stratum = max(allocation.keys(), key=lambda x: allocation[x])
+        if allocation[stratum] <= 2:
+            break
+        allocation[stratum] -= 1
+
+    # The sample can only be estimated if every stratum has at least two players sampled and the sample is smaller
+    # than the player base
+    uncertain = sum(allocation.values()) > sample_size or sum(allocation.values()) >= len(hist_labels)
+
+    random = Random(seed)
+    tp = 0
+    fp = 0
+    fn = 0
+    strata_sample = []
+    for stratum in [] if uncertain else strata.keys():
+        population = strata[stratum]
+        stratum_size = allocation[stratum]
+        sample = random.sample(population, stratum_size)
+
+        # Label only the sampled players with the new definition
+        sample_tp = []
+        sample_fp = []
+        sample_fn = []
+        for player in sample:
+            player_definition = definition[player] if isinstance(definition, dict) else definition
+            label = 'Churner' if players_la[player] > player_definition else 'Non-Churner'
+            sample_tp += [1 if label == 'Churner' and hist_labels[player] == 'Churner' else 0]
+            sample_fp += [1 if label == 'Non-Churner' and hist_labels[player] == 'Churner' else 0]
+            sample_fn += [1 if label == 'Churner' and hist_labels[player] == 'Non-Churner' else 0]
+
+        # Expand the sample to the stratum
+        tp += len(population) * sum(sample_tp) / stratum_size
+        fp += len(population) * sum(sample_fp) / stratum_size
+        fn += len(population) * sum(sample_fn) / stratum_size
+        strata_sample += [(len(population), hist_labels[population[0]], sample_tp, sample_fp, sample_fn)]
+
+    # CDCR = 1 - F1-Score = (FP + FN) / (2 * TP + FP + FN)
+    denominator = 2 * tp + fp + fn
+    if not uncertain and denominator > 0:
+        cdcr = (fp + fn) / denominator
+
+        # Variance of the ratio by linearization, summed over the strata
+        variance = 0
+        changes = 0
+        for population_size, hist_label, sample_tp, sample_fp, sample_fn in strata_sample:
+            n = len(sample_tp)
+            changes += sum(sample_fp) + sum(sample_fn)
+            # A stratum fully sampled has no variance
+            if n == population_size:
+                continue
+            residuals = [(sample_fp[x] + sample_fn[x]) - cdcr * (2 * sample_tp[x] + sample_fp[x] + sample_fn[x])
+                         for x in range(0, n)]
+            mean = sum(residuals) / n
+            residuals_variance = sum([pow(residual - mean, 2) for residual in residuals]) / (n - 1)
+            # The labels only change one way in a stratum, so its residuals take two values: a stratum without
+            # variance in the sample (e.g., no label changed) is bounded by the rule of three, i.e., up to 3 / n of
+            # its labels changed
+            if residuals_variance == 0:
+                rate = min(0.5, 3 / n)
+                gap = 1 + cdcr if hist_label == 'Churner' else 1 - cdcr
+                residuals_variance = rate * (1 - rate) * pow(gap, 2)
+            variance += pow(population_size, 2) * (1 - n / population_size) * residuals_variance / n
+
+        # The normal approximation needs at least five labels changed in the whole sample
+        if changes >= 5:
+            error = NormalDist().inv_cdf(0.5 + confidence / 2) * sqrt(variance) / denominator
+            lower = max(0, cdcr - error)
+            upper = min(1, cdcr + error)
+
+            # The decision is certain
+            if not lower <= threshold <= upper:
+                return tp, fp, fn, cdcr, lower, upper, False
+
+    # Calculate the exact CDCR
+    if isinstance(definition, dict):
+        players_labels = label_players_ifv(definition, players_la)
+    else:
+        players_labels = label_players_fv(definition, players_la)
+    tp, fp, _, fn, _, _, f1_score = calculate_f1_score(hist_labels, players_labels)
+    cdcr = 1 - f1_score
+
+    return tp, fp, fn, cdcr, cdcr, cdcr, True
+
+
+def execute_run_dag(nodes: list, max_workers: int, memory_budget_mb: int, executor='process') -> None:
+    """
+    Execute the nodes of a dependency graph concurrently. A node starts as soon as its dependencies are done and both
+    a worker and its memory are available. The smaller nodes are started first, so they never wait behind a large one.
+    A node bigger than the whole budget runs alone
+
+    :param nodes: The nodes, as returned by <build_run_dag>
+    :param max_workers: The maximum number of nodes running at the same time
+    :param memory_budget_mb: The memory, in MB, shared by the running nodes
+    :param executor: The executor backend, 'process' or 'thread'
+    """
+    if executor == 'process':
+        pool = ProcessPoolExecutor(max_workers=max_workers)
+    elif executor == 'thread':
+        pool = ThreadPoolExecutor(max_workers=max_workers)
+    else:
+        raise Exception(f"Executor unknown: {executor}")
+
+    pending = {}
+    for node in nodes:
+        if node['id'] in pending:
+            raise Exception(f"Node's ID duplicate: {node['id']}")
+        pending[node['id']] = node
+    done = set()
+    running = {}
+    memory_used = 0
+    with pool:
+        while len(pending) > 0 or len(running) > 0:
+            # Start the ready nodes that fit in the budget, the smallest first
+            ready = [node for node in pending.values() if all(dep in done for dep in node['deps'])]
+            for node in sorted(ready, key=lambda ready_node: ready_node['memory_mb']):
+                if len(running) >= max_workers:
+                    break
+                if len(running) > 0 and memory_used + node['memory_mb'] > memory_budget_mb:
+                    continue
+                running[pool.submit(run_dag_node, node)] = node
+                memory_used += node['memory_mb']
+                del pending[node['id']]
+
+            if len(running) == 0:
+                raise Exception(f"Nodes with unresolved dependencies: {list(pending.keys())}")
+
+            # Wait for a node to finish and release its resources
+            finished, _ = wait(running.keys(), return_when=FIRST_COMPLETED)
+            for future in finished:
+                node = running.pop(future)
+                memory_used -= node['memory_mb']
+                # Raise the node's exception, if any
+                future.result()
+                done.add(node['id'])
+
+
 def file_exist(full_path: str) -> bool:
     """
     Return if a file exist in the path
@@ -208,6 +939,48 @@ def fv_calculation(data: dict):
         return (average/count), players_last_absence
 
 
+def generate_players_logs(players: int, days: int, seed: int = 0) -> dict:
+    """
+    Generate randomized players' frequencies following the input data description, plus edge cases such as players
+    that never played, churned, returned on the last day, whose log values are padded with spaces or, against the
+    input data description, with '-1' after a day played
+
+    :param players: The number of randomized players
+    :param days: The number of days, at least 2
+    :param seed: The seed used to generate the frequencies
+    :return: A dict containing the players' frequency, in the same format returned by <load_csv>
+    """
+    random = Random(seed)
+    data = {}
+    for player in range(0, players):
+        # The day of the first login, the chance of an absence and the day of the churn
+        first_day = random.randint(0, days)
+        absence_chance = random.random()
+        churn_day = random.randint(first_day, 2 * days)
+        frequency = ['-1'] * first_day
+        while len(frequency) < days:
+            if len(frequency) == first_day:
+                frequency += [random.choice(['0', '1'])]
+            elif len(frequency) >= churn_day or random.random() < absence_chance:
+                frequency += ['0']
+            else:
+                frequency += ['1']
+        data['player_{}'.format(player)] = frequency
+
+    data['edge_never_played'] = ['-1'] * days
+    data['edge_always_played'] = ['1'] * days
+    data['edge_always_absent'] = ['0'] * days
+    data['edge_churned'] = ['1'] + ['0'] * (days - 1)
+    data['edge_returned_last_day'] = ['1'] + ['0'] * (days - 2) + ['1']
+    data['edge_alternating'] = (['0', '1'] * days)[:days]
+    data['edge_first_absence_last_day'] = ['-1'] * (days - 1) + ['0']
+    data['edge_first_play_last_day'] = ['-1'] * (days - 1) + ['1']
+    data['edge_spaced_values'] = ([' -1', ' 1', ' 0', ' 0', ' 1', ' 0'] * days)[:days]
+    data['edge_unplayed_after_played'] = (['1', '0', '0', '1', '-1', '-1', '-1'] * days)[:days]
+
+    return data
+
+
 def ifv_calculation(data: dict):
     """
     Calculate the Individual Fixed Value and Last Absence from the players' frequencies data
@@ -226,6 +999,103 @@ def ifv_calculation(data: dict):
     return players_ifv, players_last_absence
 
 
+def iterate_ifvs_fvs_las(data: dict, players_cohort: dict = None):
+    """
+    Lazily calculate, day by day, the same Fixed Values, Individual Fixed Values and Last Absences stored by
+    <calculate_all_ifvs_fvs_las>. Each day is yielded as a tuple (day, fv, ifv, la, cfv), where cfv is None if the
+    players' cohort is not informed. Only the players' current absences are kept between the days, so the previous
+    days can be released as soon as their consumers are done with them.
+    As described in the input data, the '-1' must only occur before the first day played, otherwise an exception is
+    raised by <encode_frequency>
+
+    :param data: The players' frequency, as returned by <load_csv> or <load_encoded_csv>
+    :param players_cohort: Optional players' cohort. If informed, the cohorts' Fixed Values are also calculated
+    """
+    players = list(data.keys())
+    frequencies = [data[player] if isinstance(data[player], bytes) else encode_frequency(data[player])
+                   for player in players]
+    # Each player's current absence, Absences With Return summed and number of Absences With Return
+    absences = [0] * len(players)
+    totals = [0] * len(players)
+    counts = [0] * len(players)
+    fv_total = 0
+    fv_count = 0
+
+    cohorts = None
+    if players_cohort is not None:
+        cohorts = [players_cohort.get(player, 'Unknown') for player in players]
+        cohorts_total = dict.fromkeys(cohorts, 0)
+        cohorts_count = dict.fromkeys(cohorts, 0)
+
+    # Number of days in the dataset
+    end = len(frequencies[0]) if len(frequencies) > 0 else 0
+    for day in range(1, end + 1):
+        for index in range(len(players)):
+            code = frequencies[index][day - 1]
+            # Sum an absence
+            if code == 1:
+                absences[index] += 1
+            # Sum an Absence With Return
+            elif code == 2 and absences[index] > 0:
+                totals[index] += absences[index]
+                counts[index] += 1
+                fv_total += absences[index]
+                fv_count += 1
+                if cohorts is not None:
+                    cohorts_total[cohorts[index]] += absences[index]
+                    cohorts_count[cohorts[index]] += 1
+                absences[index] = 0
+
+        players_ifv = {}
+        players_la = {}
+        for index in range(len(players)):
+            players_ifv[players[index]] = 0 if counts[index] == 0 else totals[index] / counts[index]
+            players_la[players[index]] = absences[index]
+
+        fv = 0 if fv_count == 0 else fv_total / fv_count
+
+        cfv = None
+        if cohorts is not None:
+            cfv = {}
+            for cohort in cohorts_total.keys():
+                cfv[cohort] = 0 if cohorts_count[cohort] == 0 else cohorts_total[cohort] / cohorts_count[cohort]
+
+        yield day, fv, players_ifv, players_la, cfv
+
+
+def iterate_stored_ifvs_fvs_las(data_fvs: dict, data_ifvs: dict, data_cfvs: dict = None):
+    """
+    Iterate, day by day, through the Fixed Values, Individual Fixed Values and Last Absences stored by
+    <calculate_all_ifvs_fvs_las>, yielding the same tuples as <iterate_ifvs_fvs_las>
+
+    :param data_fvs: The players' Fixed Values
+    :param data_ifvs: The players' Individual Fixed Values
+    :param data_cfvs: Optional cohorts' Fixed Values
+    """
+    for day in range(1, len(data_fvs) + 1):
+        cfv = None if data_cfvs is None else data_cfvs[day]['cfv']
+        yield day, data_fvs[day]['fv'], data_ifvs[day]['ifv'], data_ifvs[day]['la'], cfv
+
+
+def label_players_cohort_fv(cohorts_fv: dict, players_la: dict, players_cohort: dict) -> dict:
+    """
+    Label the players using their cohort's FV and Last Absence
+
+    :param cohorts_fv: Each cohort's Fixed Value
+    :param players_la: Each player's Last Absence
+    :param players_cohort: Each player's cohort. Players without a cohort belong to the 'Unknown' cohort
+    :return: A dictionary containing each player's label
+    """
+    players_label = {}
+    for player in players_la.keys():
+        if players_la[player] > cohorts_fv[players_cohort.get(player, 'Unknown')]:
+            players_label[player] = 'Churner'
+        else:
+            players_label[player] = 'Non-Churner'
+
+    return players_label
+
+
 def label_players_fv(players_fv: float, players_la: dict) -> dict:
     """
     Label the players using their FV and Last Absence
@@ -262,6 +1132,124 @@ def label_players_ifv(players_ifv: dict, players_la: dict) -> dict:
     return players_label
 
 
+def load_absence_index(file_full_path: str) -> dict:
+    """
+    Load an index of the players' absence runs stored by <save_absence_index>
+
+    :param file_full_path: The pickle file full path with extension
+    :return: A dict containing the index
+    """
+    index = load_pickle(file_full_path)
+    index['positions'] = {player: x for x, player in enumerate(index['players'])}
+
+    return index
+
+
+def load_cohorts(file_full_path: str, delimiter=',') -> dict:
+    """
+    Load a CSV file with no header mapping each player to a cohort and return the data as a dict.
+    The first column is the player's ID and the following ones (e.g., first login month, region, platform) are joined
+    to compose the cohort
+
+    :param file_full_path: The CSV file full path with extension
+    :param delimiter: The column delimiter
+    :return: A dict containing each player's cohort
+    """
+    # Verify if it is a CSV file
+    if file_full_path.split('.')[-1] != 'csv':
+        return dict()
+
+    # Read and store the cohorts
+    players_cohort = {}
+    with open(file_full_path, newline='') as csvfile:
+        csv_reader = reader(csvfile, delimiter=delimiter)
+        for row in csv_reader:
+            if row[0] in players_cohort.keys():
+                raise Exception(f"Player's ID duplicate: {row[0]}")
+            else:
+                players_cohort[row[0]] = '|'.join([column.strip() for column in row[1:]])
+
+    return players_cohort
+
+
+def load_columnar_column(results_dir: str, dataset: str, window_size: int, threshold: float, approach: str,
+                         column: str) -> array:
+    """
+    Load a single column of an experiment's per-day results stored by <write_columnar_results>
+
+    :param results_dir: The folder where the partitions are stored
+    :param dataset: The name of the game where the data was collected
+    :param window_size: The window size used in the experiment
+    :param threshold: The threshold used in the CDCR comparison, None if the definitions are never redefined
+    :param approach: The approach evaluated (e.g., 'FV', 'IFV_Redef')
+    :param column: The column name (e.g., 'CDCR')
+    :return: An array containing the column's values, one per day
+    """
+    partition = Path(results_dir) / 'dataset={}'.format(dataset) / 'window={}'.format(window_size) / \
+        'threshold={}'.format(threshold) / 'approach={}'.format(approach)
+    with open(partition / 'schema.json') as fp:
+        schema = loads(fp.read())
+
+    for schema_column in schema['columns']:
+        if schema_column['name'] == column:
+            values = array(schema_column['type'])
+            with open(partition / schema_column['file'], 'rb') as fp:
+                values.fromfile(fp, schema['rows'])
+            # The columns are stored as little-endian
+            if byteorder == 'big':
+                values.byteswap()
+            return values
+
+    raise Exception(f"Column unknown: {column}")
+
+
+def load_columnar_results(results_dir: str, dataset: str = None, window_size: int = None, threshold: float = None,
+                          approach: str = None, columns: list = None) -> list:
+    """
+    Load the experiments' per-day results stored by <write_columnar_results>. Only the partitions matching the
+    informed dataset, window size, threshold and approach and only the informed columns are read. The partitions are
+    sorted by dataset, window size, threshold (the experiments never redefined first) and approach
+
+    :param results_dir: The folder where the partitions are stored
+    :param dataset: The name of the game where the data was collected. All of them if None
+    :param window_size: The window size used in the experiment. All of them if None
+    :param threshold: The threshold used in the CDCR comparison. All of them if None
+    :param approach: The approach evaluated (e.g., 'FV', 'IFV_Redef'). All of them if None
+    :param columns: A list containing the columns names. All of them if None
+    :return: A list containing, for each partition, a dict with its Dataset, Window Size, Threshold, Approach and
+    columns
+    """
+    pattern = 'dataset={}/window={}/threshold={}/approach={}'.format('*' if dataset is None else dataset,
+                                                                      '*' if window_size is None else window_size,
+                                                                      '*' if threshold is None else threshold,
+                                                                      '*' if approach is None else approach)
+    partitions = []
+    for partition in Path(results_dir).glob(pattern):
+        partition_threshold = partition.parent.name.split('=', 1)[1]
+        partitions += [(partition.parents[2].name.split('=', 1)[1], int(partition.parents[1].name.split('=', 1)[1]),
+                        None if partition_threshold == 'None' else float(partition_threshold), partition_threshold,
+                        partition.name.split('=', 1)[1], partition)]
+    # Sort by the window size and threshold values instead of their names
+    partitions.sort(key=lambda x: (x[0], x[1], x[2] is not None, x[2] or 0, x[4]))
+
+    results = []
+    for partition_dataset, partition_window_size, partition_threshold, threshold_name, partition_approach, partition \
+            in partitions:
+        with open(partition / 'schema.json') as fp:
+            schema = loads(fp.read())
+
+        result = {'Dataset': partition_dataset, 'Window Size': partition_window_size, 'Threshold': partition_threshold,
+                  'Approach': partition_approach}
+        for schema_column in schema['columns']:
+            if columns is None or schema_column['name'] in columns:
+                result[schema_column['name']] = load_columnar_column(results_dir, partition_dataset,
+                                                                     partition_window_size, threshold_name,
+                                                                     partition_approach, schema_column['name'])
+        results += [result]
+
+    return results
+
+
 def load_csv(file_full_path: str, delimiter=',') -> dict:
     """
     Load a CSV file containing players' frequencies with no header and return the data as a dict
@@ -287,6 +1275,32 @@ def load_csv(file_full_path: str, delimiter=',') -> dict:
     return data
 
 
+def load_encoded_csv(file_full_path: str, delimiter=',') -> dict:
+    """
+    Load a CSV file containing players' frequencies with no header and return the data as a dict, with each player's
+    frequency encoded by <encode_frequency> while the file is read. It uses far less memory than <load_csv>
+
+    :param file_full_path: The CSV file full path with extension
+    :param delimiter: The column delimiter
+    :return: A dict containing the file content encoded
+    """
+    # Verify if it is a CSV file
+    if file_full_path.split('.')[-1] != 'csv':
+        return dict()
+
+    # Read and store the data
+    data = {}
+    with open(file_full_path, newline='') as csvfile:
+        csv_reader = reader(csvfile, delimiter=delimiter)
+        for row in csv_reader:
+            if row[0] in data.keys():
+                raise Exception(f"Player's ID duplicate: {row[0]}")
+            else:
+                data[row[0]] = encode_frequency(row[1:])
+
+    return data
+
+
 def load_pickle(file_full_path: str):
     """
     Load a CSV file containing players' frequencies with no header and return the data as a dict
@@ -300,7 +1314,102 @@ def load_pickle(file_full_path: str):
     return data
 
 
-def run_aiide_ifv_experiment(dataset: str, data_fvs: dict, data_ifvs: dict, windows_sizes: list):
+def load_run_config(file_full_path: str) -> dict:
+    """
+    Load a JSON file containing a run configuration. The "defaults" are applied to every dataset that does not
+    override them. Each dataset must have a unique name
+
+    :param file_full_path: The JSON file full path with extension
+    :return: A dict containing the run configuration
+    """
+    with open(file_full_path) as fp:
+        config = loads(fp.read())
+
+    defaults = {'delimiter': ',', 'cohorts': None, 'data_dir': 'Data', 'logs_dir': 'Logs',
+                'windows_sizes': [7, 14, 21, 30, 60, 90, 180, 270], 'thresholds': [0.05],
+                'experiments': ['ifv', 'redef'], 'snapshots': 'pickle', 'reuse_snapshots': False,
+                'logs_format': 'sheets'}
+    defaults.update(config.get('defaults', {}))
+
+    config.setdefault('max_workers', 1)
+    config.setdefault('memory_budget_mb', 32000)
+    config.setdefault('executor', 'process')
+    # Without an estimation, each dataset uses an equal share of the memory budget
+    defaults.setdefault('memory_mb', config['memory_budget_mb'] // config['max_workers'])
+
+    datasets = []
+    for dataset in config['datasets']:
+        if 'name' not in dataset or 'input' not in dataset:
+            raise Exception(f"Dataset without name or input: {dataset}")
+        # The name identifies the dataset's steps and files
+        if dataset['name'] in [previous['name'] for previous in datasets]:
+            raise Exception(f"Dataset's name duplicate: {dataset['name']}")
+        datasets += [dict(defaults, **dataset)]
+    config['datasets'] = datasets
+
+    return config
+
+
+def query_absence_index(index: dict, player: str, day: int):
+    """
+    Query a player's IFV and Last Absence as of a day, i.e., as if the data ended at that day
+
+    :param index: The index, as returned by <build_absence_index>
+    :param player: The player's ID
+    :param day: The day, starting from 1
+    :return: The player's Individual Fixed Value, Last Absence, and Absences With Return summed and counted, which
+    are the player's contribution to the Fixed Value
+    """
+    if day < 1 or day > index['days']:
+        raise Exception(f"Day out of the data: {day}")
+
+    position = index['positions'][player]
+    first = index['offsets'][position]
+    last = index['offsets'][position + 1]
+    # The Absences With Return are the runs that ended before the day
+    closed = bisect_left(index['ends'], day, first, last)
+    count = closed - first
+    average = index['lengths_sum'][closed] - index['lengths_sum'][first]
+
+    # The following run, if already started, is the Last Absence
+    last_absence = 0
+    if closed < last and index['starts'][closed] < day:
+        last_absence = day - index['starts'][closed]
+
+    if count == 0:
+        return 0, last_absence, average, count
+    else:
+        return (average / count), last_absence, average, count
+
+
+def query_absence_index_day(index: dict, day: int):
+    """
+    Query all the players' FV, IFV and Last Absence as of a day, i.e., as if the data ended at that day
+
+    :param index: The index, as returned by <build_absence_index>
+    :param day: The day, starting from 1
+    :return: The players' Fixed Value, Individual Fixed Value and Last Absence
+    """
+    average = 0
+    count = 0
+    players_ifv = {}
+    players_last_absence = {}
+    for player in index['players']:
+        ifv, last_absence, player_average, player_count = query_absence_index(index, player, day)
+        players_ifv[player] = ifv
+        players_last_absence[player] = last_absence
+        average += player_average
+        count += player_count
+
+    if count == 0:
+        return 0, players_ifv, players_last_absence
+    else:
+        return (average / count), players_ifv, players_last_absence
+
+
+def run_aiide_ifv_experiment(dataset: str, data_fvs: dict, data_ifvs: dict, windows_sizes: list,
+                             data_cfvs: dict = None, players_cohort: dict = None, logs_dir: str = 'Logs',
+                             logs_format: str = 'sheets', columnar_dir: str = None):
     """
     Perform the paper experiment regards the comparison between the FV and IFV.
     Generate a file containing the averages of FV, Standard Deviation, TP, FP, TN, FN,
@@ -310,197 +1419,29 @@ def run_aiide_ifv_experiment(dataset: str, data_fvs: dict, data_ifvs: dict, wind
     :param data_fvs: The players' Fixed Values
     :param data_ifvs: The players' Individual Fixed Values
     :param windows_sizes: A list containing the windows sizes to be used in the experiment
+    :param data_cfvs: Optional cohorts' Fixed Values. If informed, the cohort-level CDCR is also calculated
+    :param players_cohort: The players' cohort, required if data_cfvs is informed
+    :param logs_dir: The folder where the logs are stored
+    :param logs_format: 'sheets' to store the logs formatted for Google Sheets, 'columnar' to store the per-day
+    results as typed columns in the Columnar folder (see <write_columnar_results>) or 'both'
+    :param columnar_dir: The folder where the per-day results are stored as typed columns. If None, the Columnar
+    folder inside the logs folder
     """
-    # Create Average log header
-    with open('Logs/log_{}_{}.csv'.format(dataset, 'Average'), 'w') as file:
-        file.write('Approach;Window Size;FV Average;Standard Deviation Average;TP Average;FP Average;TN Average;'
-                   'FN Average;Precision Average;Recall Average;F1-Score Average;CDCR Average\n')
-
-    fv_averages = []
-    ifv_averages = []
-
-    for window_size in windows_sizes:
-        # Initialize variables
-        # End index
-        end = len(data_fvs)
-        # Previous players' IFV
-        players_prev_fv = None
-        # Previous players' IFV
-        players_prev_ifv = {}
-        # Start index
-        start = 0
-
-        # Create FV log header
-        with open('Logs/log_{}_{}_{}.csv'.format(dataset, 'FV', window_size), 'w') as file:
-            file.write('FV;Standard Deviation;Number of Players;TP;FP;TN;FN;Precision;Recall;F1-Score;CDCR\n')
-
-        # Create IFV log header
-        with open('Logs/log_{}_{}_{}.csv'.format(dataset, 'IFV', window_size), 'w') as file:
-            file.write('Number of Players;TP;FP;TN;FN;Precision;Recall;F1-Score;CDCR\n')
+    if data_cfvs is None:
+        players_cohort = None
 
-        players_prev_fv_average = []
-        std_dev_average = []
-        fv_tp_average = []
-        fv_fp_average = []
-        fv_tn_average = []
-        fv_fn_average = []
-        fv_precision_average = []
-        fv_recall_average = []
-        fv_f1_score_average = []
-        fv_cdcr_average = []
-        ifv_tp_average = []
-        ifv_fp_average = []
-        ifv_tn_average = []
-        ifv_fn_average = []
-        ifv_precision_average = []
-        ifv_recall_average = []
-        ifv_f1_score_average = []
-        ifv_cdcr_average = []
-
-        # Loop through the data set, starting from "start" jumping one day at a time and a window size of "window"
-        while start + window_size <= end:
-            # Reset variables
-            labels_fv_prev = {}
-            labels_ifv_curr = {}
-            labels_ifv_prev = {}
-
-            if players_prev_fv is None:
-                # Gather the FV for the players in the period
-                players_prev_fv = data_fvs[start + window_size]['fv']
-
-            # Gather the IFV and last absence for the players in the period
-            cur_ifv = data_ifvs[start + window_size]['ifv']
-            cur_la = data_ifvs[start + window_size]['la']
-
-            # If this is not the first IFV calculation, compare with the previous churn definition
-            if len(players_prev_ifv) > 0:
-                # Calculate the CDCR
-                for player in players_prev_ifv.keys():
-                    # Set the current IFV labels for the player
-                    if cur_la[player] > cur_ifv[player]:
-                        labels_ifv_curr[player] = 'Churner'
-                    else:
-                        labels_ifv_curr[player] = 'Non-Churner'
-
-                    # Set the previous FV labels for the player
-                    if cur_la[player] > players_prev_fv:
-                        labels_fv_prev[player] = 'Churner'
-                    else:
-                        labels_fv_prev[player] = 'Non-Churner'
-
-                    # Set the previous IFV labels for the player
-                    if cur_la[player] > players_prev_ifv[player]:
-                        labels_ifv_prev[player] = 'Churner'
-                    else:
-                        labels_ifv_prev[player] = 'Non-Churner'
-
-                # Get the total number of players
-                players_qnt = len(players_prev_ifv)
-                # Calculate the Standard Deviation
-                std_dev = calculate_std_dev(players_prev_fv, cur_ifv)
-                # Calculate the FV TP, FP, TN, FN, Precision, Recall, and F1-Score
-                tp, fp, tn, fn, precision, recall, f1_score = calculate_f1_score(labels_fv_prev, labels_ifv_curr)
-                # Calculate the FV CDCR
-                cdcr = 1 - f1_score
-                # Fix format for Google Sheets
-                fv_values = [players_prev_fv, std_dev, players_qnt, tp, fp, tn, fn, precision, recall, f1_score, cdcr]
-                fv_formated = format_for_google_sheets(fv_values)
+    # All the windows sizes consume the stored snapshots in a single pass
+    consumers = [aiide_window_experiment(dataset, window_size, None, players_cohort, logs_dir, logs_format,
+                                         columnar_dir) for window_size in windows_sizes]
+    averages = broadcast_snapshots(iterate_stored_ifvs_fvs_las(data_fvs, data_ifvs, data_cfvs), consumers)
 
-                # Store to calculate de averages
-                players_prev_fv_average += [players_prev_fv]
-                std_dev_average += [std_dev]
-                fv_tp_average += [tp]
-                fv_fp_average += [fp]
-                fv_tn_average += [tn]
-                fv_fn_average += [fn]
-                fv_precision_average += [precision]
-                fv_recall_average += [recall]
-                fv_f1_score_average += [f1_score]
-                fv_cdcr_average += [cdcr]
-
-                # Calculate the IFV TP, FP, TN, FN, Precision, Recall, and F1-Score
-                tp, fp, tn, fn, precision, recall, f1_score = calculate_f1_score(labels_ifv_prev, labels_ifv_curr)
-                # Calculate the IFV CDCR
-                cdcr = 1 - f1_score
-                # Fix format for Google Sheets
-                ifv_values = [players_qnt, tp, fp, tn, fn, precision, recall, f1_score, cdcr]
-                ifv_formated = format_for_google_sheets(ifv_values)
-
-                # Store to calculate de averages
-                ifv_tp_average += [tp]
-                ifv_fp_average += [fp]
-                ifv_tn_average += [tn]
-                ifv_fn_average += [fn]
-                ifv_precision_average += [precision]
-                ifv_recall_average += [recall]
-                ifv_f1_score_average += [f1_score]
-                ifv_cdcr_average += [cdcr]
-
-                # Store FV log
-                with open('Logs/log_{}_{}_{}.csv'.format(dataset, 'FV', window_size), 'a') as file:
-                    file.write('{};{};{};{};{};{};{};{};{};{};{}\n'.format(fv_formated[0], fv_formated[1],
-                                                                           fv_formated[2], fv_formated[3],
-                                                                           fv_formated[4], fv_formated[5],
-                                                                           fv_formated[6], fv_formated[7],
-                                                                           fv_formated[8], fv_formated[9],
-                                                                           fv_formated[10]))
+    if logs_format in ('sheets', 'both'):
+        store_aiide_averages(dataset, windows_sizes, averages, '', logs_dir)
 
-                # Store IFV log
-                with open('Logs/log_{}_{}_{}.csv'.format(dataset, 'IFV', window_size), 'a') as file:
-                    file.write('{};{};{};{};{};{};{};{};{}\n'.format(ifv_formated[0], ifv_formated[1], ifv_formated[2],
-                                                                     ifv_formated[3], ifv_formated[4], ifv_formated[5],
-                                                                     ifv_formated[6], ifv_formated[7], ifv_formated[8]))
-            else:
-                # Store the current IFV to be used in the next loop
-                players_prev_ifv = cur_ifv
 
-            # Advances one day
-            start += 1
-
-        fv_averages += [[str(sum(players_prev_fv_average)/len(players_prev_fv_average)).replace('.', ','),
-                         str(sum(std_dev_average)/len(std_dev_average)).replace('.', ','),
-                         str(sum(fv_tp_average)/len(fv_tp_average)).replace('.', ','),
-                         str(sum(fv_fp_average)/len(fv_fp_average)).replace('.', ','),
-                         str(sum(fv_tn_average)/len(fv_tn_average)).replace('.', ','),
-                         str(sum(fv_fn_average)/len(fv_fn_average)).replace('.', ','),
-                         str(sum(fv_precision_average)/len(fv_precision_average)).replace('.', ','),
-                         str(sum(fv_recall_average)/len(fv_recall_average)).replace('.', ','),
-                         str(sum(fv_f1_score_average)/len(fv_f1_score_average)).replace('.', ','),
-                         str(sum(fv_cdcr_average)/len(fv_cdcr_average)).replace('.', ',')]]
-
-        ifv_averages += [['None',
-                          'None',
-                         str(sum(ifv_tp_average)/len(ifv_tp_average)).replace('.', ','),
-                         str(sum(ifv_fp_average)/len(ifv_fp_average)).replace('.', ','),
-                         str(sum(ifv_tn_average)/len(ifv_tn_average)).replace('.', ','),
-                         str(sum(ifv_fn_average)/len(ifv_fn_average)).replace('.', ','),
-                         str(sum(ifv_precision_average)/len(ifv_precision_average)).replace('.', ','),
-                         str(sum(ifv_recall_average)/len(ifv_recall_average)).replace('.', ','),
-                         str(sum(ifv_f1_score_average)/len(ifv_f1_score_average)).replace('.', ','),
-                         str(sum(ifv_cdcr_average)/len(ifv_cdcr_average)).replace('.', ',')]]
-
-    for x in range(0, len(fv_averages)):
-        # Store the FV Average Log
-        with open('Logs/log_{}_{}.csv'.format(dataset, 'Average'), 'a') as file:
-            file.write('{};{};{};{};{};{};{};{};{};{};{};{}\n'.format('FV', windows_sizes[x], fv_averages[x][0],
-                                                                      fv_averages[x][1], fv_averages[x][2],
-                                                                      fv_averages[x][3], fv_averages[x][4],
-                                                                      fv_averages[x][5], fv_averages[x][6],
-                                                                      fv_averages[x][7], fv_averages[x][8],
-                                                                      fv_averages[x][9]))
-
-    for x in range(0, len(ifv_averages)):
-        # Store the IFV Average Log
-        with open('Logs/log_{}_{}.csv'.format(dataset, 'Average'), 'a') as file:
-            file.write('{};{};{};{};{};{};{};{};{};{};{};{}\n'.format('IFV', windows_sizes[x], ifv_averages[x][0],
-                                                                      ifv_averages[x][1], ifv_averages[x][2],
-                                                                      ifv_averages[x][3], ifv_averages[x][4],
-                                                                      ifv_averages[x][5], ifv_averages[x][6],
-                                                                      ifv_averages[x][7], ifv_averages[x][8],
-                                                                      ifv_averages[x][9]))
-
-
-def run_aiide_redef_experiment(dataset: str, data_fvs: dict, data_ifvs: dict, windows_sizes: list, threshold: float):
+def run_aiide_redef_experiment(dataset: str, data_fvs: dict, data_ifvs: dict, windows_sizes: list, threshold: float,
+                               data_cfvs: dict = None, players_cohort: dict = None, logs_dir: str = 'Logs',
+                               logs_format: str = 'sheets', columnar_dir: str = None):
     """
     Perform the paper experiment regards the comparison using and not using the redefinition.
     Generate a file containing the averages of FV, Standard Deviation, TP, FP, TN, FN,
@@ -511,211 +1452,325 @@ def run_aiide_redef_experiment(dataset: str, data_fvs: dict, data_ifvs: dict, wi
     :param data_ifvs: The players' Individual Fixed Values
     :param windows_sizes: A list containing the windows sizes to be used in the experiment
     :param threshold: The threshold used in the CDCR comparison
+    :param data_cfvs: Optional cohorts' Fixed Values. If informed, the cohort-level CDCR is also calculated
+    :param players_cohort: The players' cohort, required if data_cfvs is informed
+    :param logs_dir: The folder where the logs are stored
+    :param logs_format: 'sheets' to store the logs formatted for Google Sheets, 'columnar' to store the per-day
+    results as typed columns in the Columnar folder (see <write_columnar_results>) or 'both'
+    :param columnar_dir: The folder where the per-day results are stored as typed columns. If None, the Columnar
+    folder inside the logs folder
     """
-    # Create Average log header
-    with open('Logs/log_{}_{}_Redef.csv'.format(dataset, 'Average'), 'w') as file:
-        file.write(
-            'Approach;Window Size;FV Average;Standard Deviation Average;TP Average;FP Average;TN Average;FN Average;'
-            'Precision Average;Recall Average;F1-Score Average;CDCR Average\n')
-
-    fv_averages = []
-    ifv_averages = []
-
-    for window_size in windows_sizes:
-        # Initialize variables
-        # End index
-        end = len(data_fvs)
-        # Previous players' IFV
-        players_prev_fv = None
-        # Previous players' IFV
-        players_prev_ifv = {}
-        # Start index
-        start = 0
-
-        # Create FV log header
-        with open('Logs/log_{}_{}_{}_Redef.csv'.format(dataset, 'FV', window_size), 'w') as file:
-            file.write('FV;Standard Deviation;Number of Players;TP;FP;TN;FN;Precision;Recall;F1-Score;CDCR\n')
+    if data_cfvs is None:
+        players_cohort = None
 
-        # Create IFV log header
-        with open('Logs/log_{}_{}_{}_Redef.csv'.format(dataset, 'IFV', window_size), 'w') as file:
-            file.write('Number of Players;TP;FP;TN;FN;Precision;Recall;F1-Score;CDCR\n')
+    # All the windows sizes consume the stored snapshots in a single pass
+    consumers = [aiide_window_experiment(dataset, window_size, threshold, players_cohort, logs_dir, logs_format,
+                                         columnar_dir) for window_size in windows_sizes]
+    averages = broadcast_snapshots(iterate_stored_ifvs_fvs_las(data_fvs, data_ifvs, data_cfvs), consumers)
 
-        players_prev_fv_average = []
-        std_dev_average = []
-        fv_tp_average = []
-        fv_fp_average = []
-        fv_tn_average = []
-        fv_fn_average = []
-        fv_precision_average = []
-        fv_recall_average = []
-        fv_f1_score_average = []
-        fv_cdcr_average = []
-        ifv_tp_average = []
-        ifv_fp_average = []
-        ifv_tn_average = []
-        ifv_fn_average = []
-        ifv_precision_average = []
-        ifv_recall_average = []
-        ifv_f1_score_average = []
-        ifv_cdcr_average = []
-
-        # Loop through the data set, starting from "start" jumping one day at a time and a window size of "window"
-        while start + window_size <= end:
-            # Reset variables
-            labels_fv_prev = {}
-            labels_ifv_curr = {}
-            labels_ifv_prev = {}
-
-            if players_prev_fv is None:
-                # Gather the FV for the players in the period
-                players_prev_fv = data_fvs[start + window_size]['fv']
-
-            # Gather the IFV and last absence for the players in the period
-            cur_ifv = data_ifvs[start + window_size]['ifv']
-            cur_la = data_ifvs[start + window_size]['la']
-
-            # If this is not the first IFV calculation, compare with the previous churn definition
-            if len(players_prev_ifv) > 0:
-                # Calculate the CDCR
-                for player in players_prev_ifv.keys():
-                    # Set the current IFV labels for the player
-                    if cur_la[player] > cur_ifv[player]:
-                        labels_ifv_curr[player] = 'Churner'
-                    else:
-                        labels_ifv_curr[player] = 'Non-Churner'
+    if logs_format in ('sheets', 'both'):
+        store_aiide_averages(dataset, windows_sizes, averages, '_Redef', logs_dir)
 
-                    # Set the previous FV labels for the player
-                    if cur_la[player] > players_prev_fv:
-                        labels_fv_prev[player] = 'Churner'
-                    else:
-                        labels_fv_prev[player] = 'Non-Churner'
 
-                    # Set the previous IFV labels for the player
-                    if cur_la[player] > players_prev_ifv[player]:
-                        labels_ifv_prev[player] = 'Churner'
-                    else:
-                        labels_ifv_prev[player] = 'Non-Churner'
-
-                # Get the total number of players
-                players_qnt = len(players_prev_ifv)
-                # Calculate the Standard Deviation
-                std_dev = calculate_std_dev(players_prev_fv, cur_ifv)
-                # Calculate the FV TP, FP, TN, FN, Precision, Recall, and F1-Score
-                tp, fp, tn, fn, precision, recall, f1_score = calculate_f1_score(labels_fv_prev,
-                                                                                 labels_ifv_curr)
-                # Calculate the FV CDCR
-                fv_cdcr = 1 - f1_score
-                # Fix format for Google Sheets
-                fv_values = [players_prev_fv, std_dev, players_qnt, tp, fp, tn, fn, precision, recall, f1_score,
-                             fv_cdcr]
-                fv_formated = format_for_google_sheets(fv_values)
+def run_aiide_stream_experiments(dataset: str, snapshots, windows_sizes: list, thresholds: list,
+                                 players_cohort: dict = None, logs_dir: str = 'Logs', logs_format: str = 'sheets'):
+    """
+    Perform the paper experiments for every window size and threshold in a single pass through the days' snapshots.
+    A threshold None performs the experiment regards the comparison between the FV and IFV, and the other thresholds
+    the experiment regards the redefinition. With more than one redefinition threshold, each one has its own folder,
+    while the per-day results of all the thresholds are stored in the same Columnar folder, partitioned by threshold
 
-                # Store to calculate de averages
-                players_prev_fv_average += [players_prev_fv]
-                std_dev_average += [std_dev]
-                fv_tp_average += [tp]
-                fv_fp_average += [fp]
-                fv_tn_average += [tn]
-                fv_fn_average += [fn]
-                fv_precision_average += [precision]
-                fv_recall_average += [recall]
-                fv_f1_score_average += [f1_score]
-                fv_cdcr_average += [fv_cdcr]
-
-                # Calculate the IFV TP, FP, TN, FN, Precision, Recall, and F1-Score
-                tp, fp, tn, fn, precision, recall, f1_score = calculate_f1_score(labels_ifv_prev,
-                                                                                 labels_ifv_curr)
-                # Calculate the IFV CDCR
-                ifv_cdcr = 1 - f1_score
-                # Fix format for Google Sheets
-                ifv_values = [players_qnt, tp, fp, tn, fn, precision, recall, f1_score, ifv_cdcr]
-                ifv_formated = format_for_google_sheets(ifv_values)
+    :param dataset: The name of the game where the data was collected. Used for file naming only
+    :param snapshots: An iterable of days' snapshots, as yielded by <iterate_ifvs_fvs_las>
+    :param windows_sizes: A list containing the windows sizes to be used in the experiments
+    :param thresholds: A list containing the thresholds used in the CDCR comparison
+    :param players_cohort: The players' cohort. If informed, the cohort-level CDCR is also calculated
+    :param logs_dir: The folder where the logs are stored
+    :param logs_format: 'sheets' to store the logs formatted for Google Sheets, 'columnar' to store the per-day
+    results as typed columns in the Columnar folder (see <write_columnar_results>) or 'both'
+    """
+    redef_thresholds = [threshold for threshold in thresholds if threshold is not None]
+    thresholds_logs_dir = []
+    consumers = []
+    for threshold in thresholds:
+        threshold_logs_dir = logs_dir
+        # Each threshold has its own folder to avoid overwriting the logs
+        if threshold is not None and len(redef_thresholds) > 1:
+            threshold_logs_dir = '{}/Threshold_{}'.format(logs_dir, threshold)
+            Path(threshold_logs_dir).mkdir(parents=True, exist_ok=True)
+        thresholds_logs_dir += [threshold_logs_dir]
+        consumers += [aiide_window_experiment(dataset, window_size, threshold, players_cohort, threshold_logs_dir,
+                                              logs_format, '{}/Columnar'.format(logs_dir))
+                      for window_size in windows_sizes]
+
+    averages = broadcast_snapshots(snapshots, consumers)
+
+    if logs_format in ('sheets', 'both'):
+        for x in range(0, len(thresholds)):
+            store_aiide_averages(dataset, windows_sizes,
+                                 averages[x * len(windows_sizes):(x + 1) * len(windows_sizes)],
+                                 '' if thresholds[x] is None else '_Redef', thresholds_logs_dir[x])
+
+
+def run_dag_node(node: dict) -> None:
+    """
+    Execute a node of a run dependency graph
 
-                # Store to calculate de averages
-                ifv_tp_average += [tp]
-                ifv_fp_average += [fp]
-                ifv_tn_average += [tn]
-                ifv_fn_average += [fn]
-                ifv_precision_average += [precision]
-                ifv_recall_average += [recall]
-                ifv_f1_score_average += [f1_score]
-                ifv_cdcr_average += [ifv_cdcr]
-
-                # Store FV log
-                with open('Logs/log_{}_{}_{}_Redef.csv'.format(dataset, 'FV', window_size), 'a') as file:
-                    file.write('{};{};{};{};{};{};{};{};{};{};{}\n'.format(fv_formated[0], fv_formated[1],
-                                                                           fv_formated[2], fv_formated[3],
-                                                                           fv_formated[4], fv_formated[5],
-                                                                           fv_formated[6], fv_formated[7],
-                                                                           fv_formated[8], fv_formated[9],
-                                                                           fv_formated[10]))
+    :param node: The node, as returned by <build_run_dag>
+    """
+    dataset = node['dataset']
+    players_cohort = None
+    if dataset['cohorts'] is not None:
+        players_cohort = load_cohorts(dataset['cohorts'], delimiter=dataset['delimiter'])
+
+    if node['kind'] == 'stream':
+        Path(node['logs_dir']).mkdir(parents=True, exist_ok=True)
+        # Import raw data and perform all the experiments in a single pass through the days
+        data = load_encoded_csv(dataset['input'], delimiter=dataset['delimiter'])
+        thresholds = []
+        if 'ifv' in dataset['experiments']:
+            thresholds += [None]
+        if 'redef' in dataset['experiments']:
+            thresholds += dataset['thresholds']
+        run_aiide_stream_experiments(dataset['name'], iterate_ifvs_fvs_las(data, players_cohort),
+                                     dataset['windows_sizes'], thresholds, players_cohort, node['logs_dir'],
+                                     dataset['logs_format'])
+        return
+
+    if node['kind'] == 'snapshots':
+        Path(dataset['data_dir']).mkdir(parents=True, exist_ok=True)
+        # Import raw data and calculate the metrics
+        data = load_csv(dataset['input'], delimiter=dataset['delimiter'])
+        calculate_all_ifvs_fvs_las(dataset['name'], data, players_cohort, dataset['data_dir'])
+        return
+
+    # Import pre-processed data
+    data_fvs = load_pickle('{}/{}_all_fvs_las.p'.format(dataset['data_dir'], dataset['name']))
+    data_ifvs = load_pickle('{}/{}_all_ifvs_las.p'.format(dataset['data_dir'], dataset['name']))
+    data_cfvs = None
+    if players_cohort is not None:
+        data_cfvs = load_pickle('{}/{}_all_cfvs_las.p'.format(dataset['data_dir'], dataset['name']))
+
+    Path(node['logs_dir']).mkdir(parents=True, exist_ok=True)
+    if node['kind'] == 'ifv':
+        run_aiide_ifv_experiment(dataset['name'], data_fvs, data_ifvs, dataset['windows_sizes'], data_cfvs,
+                                 players_cohort, node['logs_dir'], dataset['logs_format'], node['columnar_dir'])
+    elif node['kind'] == 'redef':
+        run_aiide_redef_experiment(dataset['name'], data_fvs, data_ifvs, dataset['windows_sizes'], node['threshold'],
+                                   data_cfvs, players_cohort, node['logs_dir'], dataset['logs_format'],
+                                   node['columnar_dir'])
+    else:
+        raise Exception(f"Node kind unknown: {node['kind']}")
 
-                # Store IFV log
-                with open('Logs/log_{}_{}_{}_Redef.csv'.format(dataset, 'IFV', window_size), 'a') as file:
-                    file.write(
-                        '{};{};{};{};{};{};{};{};{}\n'.format(ifv_formated[0], ifv_formated[1], ifv_formated[2],
-                                                              ifv_formated[3], ifv_formated[4], ifv_formated[5],
-                                                              ifv_formated[6], ifv_formated[7],
-                                                              ifv_formated[8]))
 
-                # Verify the need to =redefine the FV
-                if fv_cdcr >= threshold:
-                    # Re-define the FV
-                    players_prev_fv = data_fvs[start + window_size]['fv']
-                # Verify the need to re-define the IFV
-                if ifv_cdcr >= threshold:
-                    # Re-define the IFV
-                    players_prev_ifv = cur_ifv
+def run_differential_check(data: dict = None, players_cohort: dict = None, seed: int = 0,
+                           logs_dir: str = 'Logs') -> list:
+    """
+    Check if the optimized backends give exactly the same results as the reference functions for every day of the
+    data, and measure their speedup. A backend can only replace its reference if it has no mismatches.
+    Generate a file containing, for each backend, its reference, the number of checks and mismatches, the time spent
+    by the reference and by the backend, and the speedup
+
+    :param data: The players' frequency. If None, the data is generated by <generate_players_logs>
+    :param players_cohort: The players' cohort. If None, the players are randomly assigned to three cohorts
+    :param seed: The seed used to generate the data, the cohorts and the samples
+    :param logs_dir: The folder where the log is stored. If None, the log is not stored
+    :return: A list containing the results of each backend
+    """
+    if data is None:
+        data = generate_players_logs(200, 120, seed)
+    if players_cohort is None:
+        random = Random(seed)
+        players_cohort = {player: random.choice(['A', 'B', 'C']) for player in data.keys()}
 
-            else:
-                # Store the current IFV to be used in the next loop
-                players_prev_ifv = cur_ifv
+    # Number of days in the dataset
+    end = len(data[list(data.keys())[0]])
+    results = []
+
+    # The backends encoding the frequencies must reject the players with '-1' after the first day played or absent,
+    # which the reference functions count as days before a day played, instead of silently giving other results.
+    # The other backends are compared with the reference functions for all the players
+    valid_data = {}
+    mismatches = 0
+    start_time = perf_counter()
+    for player in data.keys():
+        try:
+            encode_frequency(data[player])
+            valid_data[player] = data[player]
+        except Exception:
+            # The snapshots are only calculated when iterated
+            for backend in [build_absence_index, lambda x: list(iterate_ifvs_fvs_las(x))]:
+                try:
+                    backend({player: data[player]})
+                    mismatches += 1
+                except Exception:
+                    pass
+    results += [['encode_frequency', 'input data description', len(data) - len(valid_data), mismatches, 0,
+                 perf_counter() - start_time]]
+
+    # Reference: slice the data and calculate the FV, IFV, cohorts' FV and Last Absences of every day, for all the
+    # players and for the players following the input data description
+    reference = {}
+    reference_valid = {}
+    reference_time = 0
+    reference_cfv_time = 0
+    for cur_reference, cur_data in [(reference, data), (reference_valid, valid_data)]:
+        start_time = perf_counter()
+        for day in range(1, end + 1):
+            cur_data_train, _ = split_data(data=cur_data, offset_train=0, train_size=day, off_set_test=0, test_size=0)
+            cur_fv, cur_fv_la = fv_calculation(cur_data_train)
+            cur_ifv, cur_ifv_la = ifv_calculation(cur_data_train)
+            cur_reference[day] = {'fv': cur_fv, 'fv_la': cur_fv_la, 'ifv': cur_ifv, 'ifv_la': cur_ifv_la}
+        reference_time = perf_counter() - start_time
+
+        # Filter the players of each cohort and calculate its FV
+        start_time = perf_counter()
+        cur_cohorts = sorted(set(players_cohort.get(player, 'Unknown') for player in cur_data.keys()))
+        for day in range(1, end + 1):
+            cur_data_train, _ = split_data(data=cur_data, offset_train=0, train_size=day, off_set_test=0, test_size=0)
+            cur_reference[day]['cfv'] = {}
+            for cohort in cur_cohorts:
+                cohort_data = {player: cur_data_train[player] for player in cur_data_train.keys()
+                               if players_cohort.get(player, 'Unknown') == cohort}
+                cur_reference[day]['cfv'][cohort], _ = fv_calculation(cohort_data)
+        if cur_data is data:
+            reference_cfv_time = perf_counter() - start_time
+
+    # Backend: the cohorts' FV in a single grouped aggregation
+    mismatches = 0
+    start_time = perf_counter()
+    for day in range(1, end + 1):
+        cur_data_train, _ = split_data(data=data, offset_train=0, train_size=day, off_set_test=0, test_size=0)
+        cur_cfv, cur_cfv_la = cohort_fv_calculation(cur_data_train, players_cohort)
+        if cur_cfv != reference[day]['cfv'] or cur_cfv_la != reference[day]['fv_la']:
+            mismatches += 1
+    results += [['cohort_fv_calculation', 'fv_calculation', end, mismatches, reference_cfv_time,
+                 perf_counter() - start_time]]
+
+    # Backend: the days' snapshots calculated lazily
+    mismatches = 0
+    start_time = perf_counter()
+    for day, fv, ifv, la, cfv in iterate_ifvs_fvs_las(valid_data, players_cohort):
+        if fv != reference_valid[day]['fv'] or ifv != reference_valid[day]['ifv'] or \
+                la != reference_valid[day]['ifv_la'] or la != reference_valid[day]['fv_la'] or \
+                cfv != reference_valid[day]['cfv']:
+            mismatches += 1
+    results += [['iterate_ifvs_fvs_las', 'fv_calculation/ifv_calculation', end, mismatches, reference_time,
+                 perf_counter() - start_time]]
+
+    # Backend: the absence index, including its construction
+    mismatches = 0
+    start_time = perf_counter()
+    index = build_absence_index(valid_data)
+    for day in range(1, end + 1):
+        fv, ifv, la = query_absence_index_day(index, day)
+        if fv != reference_valid[day]['fv'] or ifv != reference_valid[day]['ifv'] or \
+                la != reference_valid[day]['ifv_la']:
+            mismatches += 1
+    results += [['absence_index', 'fv_calculation/ifv_calculation', end, mismatches, reference_time,
+                 perf_counter() - start_time]]
+
+    # The CDCR estimation needs a player base bigger than its sample: the labels of the players with the IFV of the
+    # first half of the days are compared with the labels with the IFV of all the days
+    cdcr_data = generate_players_logs(20000, 60, seed)
+    cur_data_train, _ = split_data(data=cdcr_data, offset_train=0, train_size=30, off_set_test=0, test_size=0)
+    hist_ifv, _ = ifv_calculation(cur_data_train)
+    cdcr_ifv, cdcr_la = ifv_calculation(cdcr_data)
+    hist_labels_ifv = label_players_ifv(hist_ifv, cdcr_la)
+    # The players in several small cohorts, merged by the estimation, or in a few big ones, sampled apart
+    random = Random(seed)
+    small_strata = {player: random.randrange(0, 400) for player in cdcr_data.keys()}
+    big_strata = {player: random.randrange(0, 15) for player in cdcr_data.keys()}
+
+    # Reference: label all the players and calculate the CDCR
+    start_time = perf_counter()
+    ref_tp, ref_fp, _, ref_fn, _, _, ref_f1_score = calculate_f1_score(hist_labels_ifv,
+                                                                       label_players_ifv(cdcr_ifv, cdcr_la))
+    ref_cdcr = 1 - ref_f1_score
+    reference_f1_time = perf_counter() - start_time
+
+    # Backend: the CDCR estimation, whose decision (including the exact computation when it is uncertain) must be the
+    # same as the reference one for thresholds around the CDCR, several samples and strata. The confidence level is
+    # high enough for a wrong decision to point to an interval too narrow instead of the chance. With the biggest
+    # sample, the thresholds far from the CDCR must be decided without the exact computation
+    checks = 0
+    mismatches = 0
+    start_time = perf_counter()
+    for threshold in [ref_cdcr / 2, ref_cdcr * 0.97, ref_cdcr * 1.03, ref_cdcr * 2]:
+        for players_strata in [None, small_strata, big_strata]:
+            for sample_size in [500, 2000]:
+                for sample_seed in range(seed, seed + 10):
+                    tp, fp, fn, cdcr, _, _, exact = estimate_cdcr(hist_labels_ifv, cdcr_ifv, cdcr_la, threshold,
+                                                                  sample_size, confidence=0.9999, seed=sample_seed,
+                                                                  players_strata=players_strata)
+                    checks += 1
+                    if (cdcr > threshold) != (ref_cdcr > threshold) or \
+                            (exact and (tp, fp, fn) != (ref_tp, ref_fp, ref_fn)) or \
+                            (exact and sample_size == 2000 and threshold in [ref_cdcr / 2, ref_cdcr * 2]):
+                        mismatches += 1
+    results += [['estimate_cdcr', 'calculate_f1_score', checks, mismatches, reference_f1_time * checks,
+                 perf_counter() - start_time]]
+
+    # Reference: label the players of each cohort using the cohort's FV
+    reference_labels = {}
+    start_time = perf_counter()
+    for day in range(1, end + 1):
+        reference_labels[day] = {}
+        for cohort in reference[day]['cfv'].keys():
+            cohort_la = {player: la for player, la in reference[day]['fv_la'].items()
+                         if players_cohort.get(player, 'Unknown') == cohort}
+            reference_labels[day].update(label_players_fv(reference[day]['cfv'][cohort], cohort_la))
+    reference_labels_time = perf_counter() - start_time
+
+    # Backend: the cohorts' labels
+    mismatches = 0
+    start_time = perf_counter()
+    for day in range(1, end + 1):
+        if label_players_cohort_fv(reference[day]['cfv'], reference[day]['fv_la'], players_cohort) != \
+                reference_labels[day]:
+            mismatches += 1
+    results += [['label_players_cohort_fv', 'label_players_fv', end, mismatches, reference_labels_time,
+                 perf_counter() - start_time]]
+
+    # Calculate the speedups
+    for result in results:
+        result += [result[4] / result[5] if result[5] > 0 else 0]
+
+    if logs_dir is not None:
+        with open('{}/log_Differential.csv'.format(logs_dir), 'w') as file:
+            file.write('Backend;Reference;Checks;Mismatches;Reference Time;Backend Time;Speedup\n')
+            for result in results:
+                file.write(';'.join(format_for_google_sheets(result)) + '\n')
+
+    different = [result[0] for result in results if result[3] > 0]
+    if len(different) > 0:
+        raise Exception(f"Backends different from the reference: {different}")
+
+    return results
+
+
+def run_experiments_config(file_full_path: str) -> None:
+    """
+    Perform all the experiments described in a run configuration file, running the independent steps concurrently
 
-            # Advances one day
-            start += 1
-
-        fv_averages += [[str(sum(players_prev_fv_average) / len(players_prev_fv_average)).replace('.', ','),
-                         str(sum(std_dev_average) / len(std_dev_average)).replace('.', ','),
-                         str(sum(fv_tp_average) / len(fv_tp_average)).replace('.', ','),
-                         str(sum(fv_fp_average) / len(fv_fp_average)).replace('.', ','),
-                         str(sum(fv_tn_average) / len(fv_tn_average)).replace('.', ','),
-                         str(sum(fv_fn_average) / len(fv_fn_average)).replace('.', ','),
-                         str(sum(fv_precision_average) / len(fv_precision_average)).replace('.', ','),
-                         str(sum(fv_recall_average) / len(fv_recall_average)).replace('.', ','),
-                         str(sum(fv_f1_score_average) / len(fv_f1_score_average)).replace('.', ','),
-                         str(sum(fv_cdcr_average) / len(fv_cdcr_average)).replace('.', ',')]]
-
-        ifv_averages += [['None',
-                          'None',
-                          str(sum(ifv_tp_average) / len(ifv_tp_average)).replace('.', ','),
-                          str(sum(ifv_fp_average) / len(ifv_fp_average)).replace('.', ','),
-                          str(sum(ifv_tn_average) / len(ifv_tn_average)).replace('.', ','),
-                          str(sum(ifv_fn_average) / len(ifv_fn_average)).replace('.', ','),
-                          str(sum(ifv_precision_average) / len(ifv_precision_average)).replace('.', ','),
-                          str(sum(ifv_recall_average) / len(ifv_recall_average)).replace('.', ','),
-                          str(sum(ifv_f1_score_average) / len(ifv_f1_score_average)).replace('.', ','),
-                          str(sum(ifv_cdcr_average) / len(ifv_cdcr_average)).replace('.', ',')]]
-
-    for x in range(0, len(fv_averages)):
-        # Store the FV Average Log
-        with open('Logs/log_{}_{}_Redef.csv'.format(dataset, 'Average'), 'a') as file:
-            file.write('{};{};{};{};{};{};{};{};{};{};{};{}\n'.format('FV', windows_sizes[x], fv_averages[x][0],
-                                                                      fv_averages[x][1], fv_averages[x][2],
-                                                                      fv_averages[x][3], fv_averages[x][4],
-                                                                      fv_averages[x][5], fv_averages[x][6],
-                                                                      fv_averages[x][7], fv_averages[x][8],
-                                                                      fv_averages[x][9]))
-
-    for x in range(0, len(ifv_averages)):
-        # Store the IFV Average Log
-        with open('Logs/log_{}_{}_Redef.csv'.format(dataset, 'Average'), 'a') as file:
-            file.write(
-                '{};{};{};{};{};{};{};{};{};{};{};{}\n'.format('IFV', windows_sizes[x], ifv_averages[x][0],
-                                                               ifv_averages[x][1], ifv_averages[x][2],
-                                                               ifv_averages[x][3], ifv_averages[x][4],
-                                                               ifv_averages[x][5], ifv_averages[x][6],
-                                                               ifv_averages[x][7], ifv_averages[x][8],
-                                                               ifv_averages[x][9]))
+    :param file_full_path: The JSON file full path with extension
+    """
+    config = load_run_config(file_full_path)
+    nodes = build_run_dag(config)
+    execute_run_dag(nodes, config['max_workers'], config['memory_budget_mb'], config['executor'])
+
+
+def save_absence_index(index: dict, file_full_path: str) -> None:
+    """
+    Store an index of the players' absence runs in a compact form, the flat arrays are stored as raw bytes
+
+    :param index: The index, as returned by <build_absence_index>
+    :param file_full_path: The pickle file full path with extension
+    """
+    # The players' positions are rebuilt when the index is loaded
+    compact_index = {key: value for key, value in index.items() if key != 'positions'}
+    with open(file_full_path, 'wb') as fp:
+        dump(compact_index, fp, protocol=HIGHEST_PROTOCOL)
 
 
 def split_data(data: dict, offset_train: int, train_size: int, off_set_test: int, test_size: int):
@@ -737,3 +1792,62 @@ def split_data(data: dict, offset_train: int, train_size: int, off_set_test: int
                                      offset_train + train_size + off_set_test + test_size]
 
     return train_window, test_window
+
+
+def store_aiide_averages(dataset: str, windows_sizes: list, averages: list, suffix: str, logs_dir: str) -> None:
+    """
+    Store the Average log of an experiment, formatted for Google Sheets
+
+    :param dataset: The name of the game where the data was collected. Used for file naming only
+    :param windows_sizes: A list containing the windows sizes used in the experiment
+    :param averages: A list containing the FV, IFV and cohorts' FV averages of each window size, as returned by
+    <aiide_window_experiment>
+    :param suffix: The log name suffix, '_Redef' for the experiment regards the redefinition
+    :param logs_dir: The folder where the logs are stored
+    """
+    # Create Average log header
+    with open('{}/log_{}_{}{}.csv'.format(logs_dir, dataset, 'Average', suffix), 'w') as file:
+        file.write('Approach;Window Size;FV Average;Standard Deviation Average;TP Average;FP Average;TN Average;'
+                   'FN Average;Precision Average;Recall Average;F1-Score Average;CDCR Average\n')
+
+    # Store the FV, IFV and CFV Average Logs
+    for approach, position in [('FV', 0), ('IFV', 1), ('CFV', 2)]:
+        for x in range(0, len(averages)):
+            if averages[x][position] is not None:
+                with open('{}/log_{}_{}{}.csv'.format(logs_dir, dataset, 'Average', suffix), 'a') as file:
+                    file.write(';'.join([approach, str(windows_sizes[x])] + averages[x][position]) + '\n')
+
+
+def write_columnar_results(results_dir: str, dataset: str, window_size: int, threshold: float, approach: str,
+                           columns: list) -> None:
+    """
+    Store an experiment's per-day results as typed binary columns, partitioned by dataset, window size, threshold and
+    approach. Each column is stored in its own little-endian file, so it can be loaded without parsing the others
+
+    :param results_dir: The folder where the partitions are stored
+    :param dataset: The name of the game where the data was collected
+    :param window_size: The window size used in the experiment
+    :param threshold: The threshold used in the CDCR comparison, None if the definitions are never redefined
+    :param approach: The approach evaluated (e.g., 'FV', 'IFV_Redef')
+    :param columns: A list containing, for each column, its name, its type ('q' for integers and 'd' for floats) and
+    its values
+    """
+    partition = Path(results_dir) / 'dataset={}'.format(dataset) / 'window={}'.format(window_size) / \
+        'threshold={}'.format(threshold) / 'approach={}'.format(approach)
+    partition.mkdir(parents=True, exist_ok=True)
+
+    schema = {'rows': 0, 'columns': []}
+    for name, typecode, values in columns:
+        column = array(typecode, values)
+        # The columns are stored as little-endian
+        if byteorder == 'big':
+            column.byteswap()
+        file_name = '{}.bin'.format(name.replace(' ', '_'))
+        with open(partition / file_name, 'wb') as fp:
+            column.tofile(fp)
+        schema['rows'] = len(column)
+        schema['columns'] += [{'name': name, 'type': typecode, 'file': file_name}]
+
+    # The schema is written last, so a partition is only readable once all its columns are stored
+    with open(partition / 'schema.json', 'w') as fp:
+        fp.write(dumps(schema))